@@ -0,0 +1,44 @@
+# api/categorias.py
+
+from django.db import transaction
+from django.db.models import Subquery
+
+from .models import Pagamento, PagamentoRecorrente, Categoria, Cliente
+
+# Quantidade máxima de pagamentos alterados por UPDATE em clientes muito grandes.
+TAMANHO_LOTE_REATRIBUICAO = 5000
+
+
+def reatribuir_pagamentos(origem, destino, tamanho_lote=TAMANHO_LOTE_REATRIBUICAO, excluir_origem=False):
+    """
+    Move todos os pagamentos (e recorrências) da categoria `origem` para `destino`
+    (ou para nenhuma categoria, se `destino` for None) com UPDATEs em conjunto,
+    limitados a `tamanho_lote` linhas cada para não travar a tabela por muito tempo.
+    Uma última passada, sem lote e com a origem bloqueada, move o que tiver sido
+    criado durante os lotes e, se `excluir_origem`, exclui a categoria na mesma
+    transação. Pode ser reexecutada com segurança caso seja interrompida no meio.
+    Retorna (pagamentos_movidos, recorrencias_movidas).
+    """
+    destino_id = destino.id if destino else None
+    pendentes = Pagamento.objects.filter(cliente_id=origem.cliente_id, categoria_id=origem.id)
+
+    pagamentos_movidos = 0
+    while True:
+        lote = pendentes.order_by().values('id')[:tamanho_lote]
+        movidos = Pagamento.objects.filter(id__in=Subquery(lote)).update(categoria_id=destino_id)
+        pagamentos_movidos += movidos
+        if movidos < tamanho_lote:
+            break
+
+    with transaction.atomic():
+        # O bloqueio impede que novos pagamentos sejam vinculados à origem até o fim da transação.
+        list(Categoria.objects.select_for_update().filter(pk=origem.pk).values_list('pk', flat=True))
+        pagamentos_movidos += pendentes.update(categoria_id=destino_id)
+        recorrencias_movidas = PagamentoRecorrente.objects.filter(
+            cliente_id=origem.cliente_id, categoria_id=origem.id
+        ).update(categoria_id=destino_id)
+        if excluir_origem:
+            origem.delete()
+        Cliente.registrar_alteracao(origem.cliente_id)
+
+    return pagamentos_movidos, recorrencias_movidas
@@ -0,0 +1,67 @@
+# api/management/commands/gerar_pagamentos_recorrentes.py
+
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from api.recorrencias import clientes_pendentes, gerar_pagamentos_do_cliente, somar_meses
+
+
+def _processar_lote(cliente_ids, ate, hoje):
+    try:
+        return sum(gerar_pagamentos_do_cliente(cliente_id, ate, hoje) for cliente_id in cliente_ids)
+    finally:
+        # Cada thread abre a própria conexão com o banco; fecha ao terminar o lote.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera os pagamentos das recorrências ativas de todos os clientes até o horizonte "
+        "informado. Pode ser executado repetidamente (ex.: diariamente via cron): "
+        "ocorrências já geradas são ignoradas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizonte-meses', type=int, default=3,
+            help="Quantos meses à frente, a partir de hoje, os pagamentos são gerados (padrão: 3).",
+        )
+        parser.add_argument(
+            '--tamanho-lote', type=int, default=200,
+            help="Quantidade de clientes por lote (padrão: 200).",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help="Lotes processados em paralelo, cada um com sua conexão (padrão: 4).",
+        )
+
+    def handle(self, *args, **options):
+        if options['horizonte_meses'] < 0:
+            raise CommandError("--horizonte-meses não pode ser negativo.")
+        if options['tamanho_lote'] < 1:
+            raise CommandError("--tamanho-lote deve ser maior que zero.")
+
+        hoje = timezone.now().date()
+        # Vai até o último dia do mês do horizonte.
+        ate = somar_meses(hoje, options['horizonte_meses'] + 1) - timedelta(days=1)
+
+        inicio = time.perf_counter()
+        cliente_ids = clientes_pendentes(ate)
+        tamanho = options['tamanho_lote']
+        lotes = [cliente_ids[i:i + tamanho] for i in range(0, len(cliente_ids), tamanho)]
+        self.stdout.write(f"Gerando pagamentos até {ate:%d/%m/%Y} para {len(cliente_ids)} clientes em {len(lotes)} lotes...")
+
+        total = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as pool:
+            for criados in pool.map(lambda lote: _processar_lote(lote, ate, hoje), lotes):
+                total += criados
+
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} pagamentos gerados para {len(cliente_ids)} clientes em {duracao:.2f}s."
+        ))
@@ -0,0 +1,230 @@
+# api/management/commands/provisionar_tenants.py
+
+import csv
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import F
+
+from api.models import Cliente, PerfilUsuario, Categoria
+from api.management.senhas import inicializar_worker, gerar_hash
+
+# Categorias criadas para todo tenant novo (nome, descrição).
+CATEGORIAS_PADRAO = [
+    ('Aluguel', 'Aluguel e condomínio'),
+    ('Folha de Pagamento', 'Salários, encargos e benefícios'),
+    ('Serviços Públicos', 'Água, luz, telefone e internet'),
+    ('Impostos', 'Tributos e taxas'),
+    ('Fornecedores', 'Compras de materiais e serviços'),
+    ('Outros', 'Despesas diversas'),
+]
+
+COLUNAS_OBRIGATORIAS = ('nome_empresa', 'username')
+
+
+class Command(BaseCommand):
+    help = (
+        "Provisiona clientes (tenants), usuários, perfis e categorias padrão em lote "
+        "a partir de um CSV com as colunas: nome_empresa, username, email, senha. "
+        "Pode ser executado novamente: registros existentes são ignorados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo_csv', help="Caminho do CSV de empresas e usuários.")
+        parser.add_argument(
+            '--tamanho-lote', type=int, default=500,
+            help="Quantidade de clientes processados por lote/transação (padrão: 500).",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Processos usados para gerar os hashes de senha (padrão: nº de CPUs).",
+        )
+        parser.add_argument(
+            '--sem-categorias', action='store_true',
+            help="Não cria as categorias padrão para os clientes.",
+        )
+
+    def handle(self, *args, **options):
+        tamanho_lote = options['tamanho_lote']
+        if tamanho_lote < 1:
+            raise CommandError("--tamanho-lote deve ser maior que zero.")
+
+        usuarios_por_empresa = self.ler_csv(options['arquivo_csv'])
+        empresas = list(usuarios_por_empresa)
+        self.stdout.write(f"{len(empresas)} clientes e {sum(map(len, usuarios_por_empresa.values()))} usuários lidos do CSV.")
+
+        workers = max(options['workers'], 1)
+        totais = {'clientes': 0, 'usuarios': 0, 'perfis': 0, 'categorias': 0}
+        conflitos = []
+        inicio = time.perf_counter()
+
+        # 'spawn' evita que os processos filhos herdem as conexões abertas com o banco.
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexto,
+                                 initializer=inicializar_worker) as pool:
+            for i in range(0, len(empresas), tamanho_lote):
+                lote = {nome: usuarios_por_empresa[nome] for nome in empresas[i:i + tamanho_lote]}
+                criados, conflitos_lote = self.provisionar_lote(lote, pool, workers, not options['sem_categorias'])
+                conflitos.extend(conflitos_lote)
+                for chave, valor in criados.items():
+                    totais[chave] += valor
+                self.stdout.write(f"  Lote {i // tamanho_lote + 1}: {min(i + tamanho_lote, len(empresas))}/{len(empresas)} clientes processados.")
+
+        duracao = time.perf_counter() - inicio
+        taxa = len(empresas) / duracao if duracao > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ Provisionamento concluído em {duracao:.2f}s ({taxa:.1f} tenants/s). "
+            f"Registros criados: {totais['clientes']} clientes, {totais['usuarios']} usuários, "
+            f"{totais['perfis']} perfis, {totais['categorias']} categorias."
+        ))
+        if conflitos:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  {len(conflitos)} usuário(s) já vinculados a outro cliente não foram associados:"
+            ))
+            for username, nome_empresa in conflitos:
+                self.stdout.write(self.style.WARNING(f"   {username} -> {nome_empresa}"))
+
+    def ler_csv(self, caminho):
+        """
+        Lê o CSV e agrupa as linhas por empresa, preservando a ordem do arquivo.
+        """
+        try:
+            with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+                leitor = csv.DictReader(arquivo)
+                faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in (leitor.fieldnames or [])]
+                if faltando:
+                    raise CommandError(f"Colunas obrigatórias ausentes no CSV: {', '.join(faltando)}")
+
+                usuarios_por_empresa = {}
+                usernames = set()
+                for numero, linha in enumerate(leitor, start=2):
+                    nome_empresa = (linha.get('nome_empresa') or '').strip()
+                    username = (linha.get('username') or '').strip()
+                    email = (linha.get('email') or '').strip()
+                    if not nome_empresa or not username:
+                        raise CommandError(f"Linha {numero}: 'nome_empresa' e 'username' são obrigatórios.")
+                    if username in usernames:
+                        raise CommandError(f"Linha {numero}: usuário '{username}' repetido no CSV.")
+                    self.validar_linha(numero, nome_empresa, username, email)
+                    usernames.add(username)
+                    usuarios_por_empresa.setdefault(nome_empresa, []).append({
+                        'username': username,
+                        'email': email,
+                        'senha': linha.get('senha') or '',
+                    })
+                return usuarios_por_empresa
+        except OSError as e:
+            raise CommandError(f"Não foi possível ler '{caminho}': {e}")
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise CommandError(f"CSV inválido em '{caminho}' (esperado UTF-8): {e}")
+
+    def validar_linha(self, numero, nome_empresa, username, email):
+        """
+        Aplica as mesmas regras dos models antes de qualquer gravação, para que um
+        valor inválido não interrompa o provisionamento no meio de um lote.
+        """
+        limites = [
+            ('nome_empresa', nome_empresa, Cliente._meta.get_field('nome_empresa').max_length),
+            ('username', username, User._meta.get_field('username').max_length),
+            ('email', email, User._meta.get_field('email').max_length),
+        ]
+        for coluna, valor, maximo in limites:
+            if len(valor) > maximo:
+                raise CommandError(f"Linha {numero}: '{coluna}' excede {maximo} caracteres.")
+        try:
+            User.username_validator(username)
+            if email:
+                validate_email(email)
+        except ValidationError as e:
+            raise CommandError(f"Linha {numero}: {' '.join(e.messages)}")
+
+    def provisionar_lote(self, lote, pool, workers, criar_categorias):
+        """
+        Cria os registros de um lote de clientes com um bulk_create por modelo.
+        Tudo que já existe no banco é ignorado, tornando a execução idempotente.
+        """
+        usuarios = [u for lista in lote.values() for u in lista]
+        existentes = set(
+            User.objects.filter(username__in=[u['username'] for u in usuarios]).values_list('username', flat=True)
+        )
+        novos = [u for u in usuarios if u['username'] not in existentes]
+
+        # O hash de senha domina o custo; roda fora da transação e em paralelo.
+        hashes = list(pool.map(gerar_hash, [u['senha'] for u in novos], chunksize=max(len(novos) // (workers * 4), 1)))
+
+        # As contagens comparam o que existe antes e depois de cada inserção: com
+        # ignore_conflicts, linhas inseridas por execuções simultâneas não são contadas.
+        with transaction.atomic():
+            clientes_existentes = set(
+                Cliente.objects.filter(nome_empresa__in=lote).values_list('nome_empresa', flat=True)
+            )
+            Cliente.objects.bulk_create(
+                [Cliente(nome_empresa=nome) for nome in lote if nome not in clientes_existentes],
+                ignore_conflicts=True,
+            )
+            clientes = dict(Cliente.objects.filter(nome_empresa__in=lote).values_list('nome_empresa', 'id'))
+
+            usuarios_antes = User.objects.filter(username__in=[u['username'] for u in usuarios]).count()
+            User.objects.bulk_create(
+                [User(username=u['username'], email=u['email'], password=h) for u, h in zip(novos, hashes)],
+                ignore_conflicts=True,
+            )
+            usuario_ids = dict(
+                User.objects.filter(username__in=[u['username'] for u in usuarios]).values_list('username', 'id')
+            )
+            com_perfil = dict(
+                PerfilUsuario.objects.filter(usuario_id__in=usuario_ids.values()).values_list('usuario_id', 'cliente_id')
+            )
+            # Usuários já vinculados a outro cliente não são alterados; são reportados ao final.
+            conflitos = [
+                (u['username'], nome)
+                for nome, lista in lote.items() for u in lista
+                if com_perfil.get(usuario_ids[u['username']], clientes[nome]) != clientes[nome]
+            ]
+            PerfilUsuario.objects.bulk_create(
+                [
+                    PerfilUsuario(usuario_id=usuario_ids[u['username']], cliente_id=clientes[nome])
+                    for nome, lista in lote.items() for u in lista
+                    if usuario_ids[u['username']] not in com_perfil
+                ],
+                ignore_conflicts=True,
+            )
+            perfis = PerfilUsuario.objects.filter(usuario_id__in=usuario_ids.values()).count() - len(com_perfil)
+
+            # O modelo de categorias é aplicado aos clientes que ainda não têm nenhuma
+            # categoria. As linhas dos clientes são bloqueadas antes da verificação para
+            # que execuções simultâneas não criem o modelo duas vezes.
+            categorias = []
+            if criar_categorias:
+                ids = list(
+                    Cliente.objects.select_for_update().filter(id__in=clientes.values())
+                    .order_by('id').values_list('id', flat=True)
+                )
+                com_categorias = set(
+                    Categoria.objects.filter(cliente_id__in=ids).values_list('cliente_id', flat=True).distinct()
+                )
+                categorias = Categoria.objects.bulk_create([
+                    Categoria(cliente_id=cliente_id, nome=nome, descricao=descricao)
+                    for cliente_id in ids
+                    if cliente_id not in com_categorias
+                    for nome, descricao in CATEGORIAS_PADRAO
+                ])
+                # Invalida o cache da listagem de categorias dos clientes que receberam o modelo.
+                Cliente.objects.filter(id__in={c.cliente_id for c in categorias}).update(
+                    versao_dados=F('versao_dados') + 1
+                )
+
+        criados = {
+            'clientes': len(clientes) - len(clientes_existentes),
+            'usuarios': len(usuario_ids) - usuarios_antes,
+            'perfis': perfis,
+            'categorias': len(categorias),
+        }
+        return criados, conflitos
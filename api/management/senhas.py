@@ -0,0 +1,24 @@
+# api/management/senhas.py
+#
+# Funções executadas nos processos do pool de hash de senhas. Ficam fora do módulo
+# do comando porque, com o método 'spawn', o filho importa este módulo antes de
+# configurar o Django, e ele não pode depender de models.
+
+import os
+
+import django
+
+
+def inicializar_worker():
+    """
+    Prepara o Django em cada processo do pool.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+def gerar_hash(senha):
+    from django.contrib.auth.hashers import make_password
+
+    # Senha vazia gera uma senha inutilizável, como em User.set_unusable_password().
+    return make_password(senha or None)
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:24
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_create_initial_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PagamentoRecorrente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descricao', models.CharField(max_length=255)),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('dia_vencimento', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(31)])),
+                ('intervalo_meses', models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)])),
+                ('data_inicio', models.DateField()),
+                ('data_fim', models.DateField(blank=True, null=True)),
+                ('ativo', models.BooleanField(default=True)),
+                ('gerado_ate', models.DateField(blank=True, editable=False, null=True)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('categoria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.categoria')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pagamentos_recorrentes', to='api.cliente')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='pagamento',
+            name='recorrencia',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pagamentos', to='api.pagamentorecorrente'),
+        ),
+        migrations.AddConstraint(
+            model_name='pagamento',
+            constraint=models.UniqueConstraint(fields=('recorrencia', 'data_competencia'), name='pagamento_recorrencia_ocorrencia_unica'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_pagamentorecorrente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='versao_dados',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_cliente_versao_dados'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='pagamentorecorrente',
+            constraint=models.CheckConstraint(condition=models.Q(('intervalo_meses__gte', 1)), name='recorrencia_intervalo_positivo'),
+        ),
+        migrations.AddConstraint(
+            model_name='pagamentorecorrente',
+            constraint=models.CheckConstraint(condition=models.Q(('dia_vencimento__gte', 1), ('dia_vencimento__lte', 31)), name='recorrencia_dia_valido'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# api/migrations/0006_pagamento_competencia_por_periodo.py
+from django.db import migrations
+
+
+def competencia_no_primeiro_dia_do_mes(apps, schema_editor):
+    """
+    Pagamentos gerados por recorrências passam a usar o período (primeiro dia do mês)
+    como data de competência. Se um período já tiver um pagamento normalizado, os
+    demais do mesmo mês são mantidos como estão para não violar a constraint única.
+    """
+    Pagamento = apps.get_model('api', 'Pagamento')
+    ocupados = set(
+        Pagamento.objects.filter(recorrencia__isnull=False, data_competencia__day=1)
+        .values_list('recorrencia_id', 'data_competencia')
+    )
+    pendentes = Pagamento.objects.filter(recorrencia__isnull=False).exclude(data_competencia__day=1)
+    for pagamento in pendentes.order_by('data_competencia').iterator():
+        periodo = pagamento.data_competencia.replace(day=1)
+        if (pagamento.recorrencia_id, periodo) in ocupados:
+            continue
+        Pagamento.objects.filter(pk=pagamento.pk).update(data_competencia=periodo)
+        ocupados.add((pagamento.recorrencia_id, periodo))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_pagamentorecorrente_constraints'),
+    ]
+
+    operations = [
+        migrations.RunPython(competencia_no_primeiro_dia_do_mes, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,22 @@
 # api/models.py
 from django.db import models
+from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
 from django.utils import timezone
 
 class Cliente(models.Model):
     nome_empresa = models.CharField(max_length=200, unique=True)
     data_criacao = models.DateTimeField(auto_now_add=True)
+    # Incrementada a cada alteração em pagamentos/categorias; invalida os caches do cliente.
+    versao_dados = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.nome_empresa
 
+    @classmethod
+    def registrar_alteracao(cls, cliente_id):
+        cls.objects.filter(pk=cliente_id).update(versao_dados=models.F('versao_dados') + 1)
+
 class PerfilUsuario(models.Model):
     usuario = models.OneToOneField(User, on_delete=models.CASCADE)
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE)
@@ -30,6 +37,31 @@ STATUS_CHOICES = [
     ('Pago', 'Pago'),
 ]
 
+class PagamentoRecorrente(models.Model):
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='pagamentos_recorrentes')
+    descricao = models.CharField(max_length=255)
+    valor = models.DecimalField(max_digits=10, decimal_places=2)
+    categoria = models.ForeignKey(Categoria, on_delete=models.SET_NULL, null=True, blank=True)
+    # Em meses com menos dias, o vencimento cai no último dia do mês.
+    dia_vencimento = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(31)])
+    intervalo_meses = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
+    data_inicio = models.DateField()
+    data_fim = models.DateField(null=True, blank=True)
+    ativo = models.BooleanField(default=True)
+    # Última data até a qual os pagamentos já foram gerados (ver api/recorrencias.py).
+    gerado_ate = models.DateField(null=True, blank=True, editable=False)
+    data_criacao = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Garantidas também no banco: um intervalo zero faria o gerador de ocorrências não terminar.
+            models.CheckConstraint(condition=models.Q(intervalo_meses__gte=1), name='recorrencia_intervalo_positivo'),
+            models.CheckConstraint(condition=models.Q(dia_vencimento__gte=1, dia_vencimento__lte=31), name='recorrencia_dia_valido'),
+        ]
+
+    def __str__(self):
+        return f"{self.descricao} (dia {self.dia_vencimento}, a cada {self.intervalo_meses} mês(es))"
+
 class Pagamento(models.Model):
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='pagamentos')
     descricao = models.CharField(max_length=255)
@@ -40,8 +72,18 @@ class Pagamento(models.Model):
     categoria = models.ForeignKey(Categoria, on_delete=models.SET_NULL, null=True, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pendente')
     numero_nota_fiscal = models.CharField(max_length=50, blank=True, null=True)
+    recorrencia = models.ForeignKey(
+        PagamentoRecorrente, on_delete=models.SET_NULL, null=True, blank=True, related_name='pagamentos'
+    )
     data_criacao = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # Impede que o mesmo período de uma recorrência seja gerado duas vezes: nos pagamentos
+            # gerados, data_competencia é o primeiro dia do mês (ver api/recorrencias.py).
+            models.UniqueConstraint(fields=['recorrencia', 'data_competencia'], name='pagamento_recorrencia_ocorrencia_unica'),
+        ]
+
     @property
     def status_calculado(self):
         if self.status == 'Pago':
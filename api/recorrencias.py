@@ -0,0 +1,193 @@
+# api/recorrencias.py
+
+import calendar
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Q, F
+from django.utils import timezone
+
+from .models import Pagamento, PagamentoRecorrente, Cliente
+
+
+def somar_meses(data, meses):
+    """
+    Soma meses a uma data, retornando sempre o primeiro dia do mês resultante.
+    """
+    ano, mes = divmod(data.month - 1 + meses, 12)
+    return date(data.year + ano, mes + 1, 1)
+
+
+def vencimentos(recorrencia, ate):
+    """
+    Todas as datas de vencimento da agenda da recorrência, do início até `ate`
+    (inclusive). Cada período (mês) tem no máximo um vencimento.
+    """
+    if recorrencia.intervalo_meses < 1:
+        return
+    limite = min(ate, recorrencia.data_fim) if recorrencia.data_fim else ate
+    passo = 0
+    while True:
+        mes = somar_meses(recorrencia.data_inicio, passo * recorrencia.intervalo_meses)
+        dia = min(recorrencia.dia_vencimento, calendar.monthrange(mes.year, mes.month)[1])
+        data = mes.replace(day=dia)
+        if data > limite:
+            return
+        if data >= recorrencia.data_inicio:
+            yield data
+        passo += 1
+
+
+def ocorrencias(recorrencia, ate, hoje):
+    """
+    Datas de vencimento da recorrência ainda não geradas, de `hoje` até `ate`
+    (inclusive). Meses anteriores a `hoje` nunca são gerados, mesmo para
+    recorrências com início no passado ou reativadas após uma pausa.
+    """
+    for data in vencimentos(recorrencia, ate):
+        if data >= hoje and (recorrencia.gerado_ate is None or data > recorrencia.gerado_ate):
+            yield data
+
+
+def novo_pagamento(recorrencia, vencimento):
+    # A competência é o período (primeiro dia do mês): é ela que identifica a ocorrência
+    # na constraint única, de modo que mudar o dia de vencimento não duplica o mês.
+    return Pagamento(
+        cliente_id=recorrencia.cliente_id,
+        recorrencia=recorrencia,
+        descricao=recorrencia.descricao,
+        valor=recorrencia.valor,
+        categoria_id=recorrencia.categoria_id,
+        data_competencia=vencimento.replace(day=1),
+        data_vencimento=vencimento,
+        status='Pendente',
+    )
+
+
+def recorrencias_pendentes(ate):
+    """
+    Recorrências ativas com ocorrências ainda não geradas até `ate`. As já
+    geradas até a data final são descartadas sem precisar calcular datas.
+    """
+    return (
+        PagamentoRecorrente.objects.filter(ativo=True)
+        .filter(Q(gerado_ate__isnull=True) | Q(gerado_ate__lt=ate))
+        .filter(Q(gerado_ate__isnull=True) | Q(data_fim__isnull=True) | Q(data_fim__gt=F('gerado_ate')))
+    )
+
+
+def gerar_pagamentos_do_cliente(cliente_id, ate, hoje=None):
+    """
+    Materializa os pagamentos das recorrências ativas do cliente até `ate`,
+    com um único bulk_create. Ocorrências já geradas são ignoradas pela data
+    `gerado_ate` e, como garantia, pela constraint única (recorrencia, data_competencia).
+    Retorna a quantidade de pagamentos efetivamente criados.
+    """
+    hoje = hoje or timezone.now().date()
+    recorrencias = list(recorrencias_pendentes(ate).filter(cliente_id=cliente_id))
+    if not recorrencias:
+        return 0
+
+    novos = [
+        novo_pagamento(recorrencia, data)
+        for recorrencia in recorrencias
+        for data in ocorrencias(recorrencia, ate, hoje)
+    ]
+    # Conta o que já existe antes e depois da inserção: com ignore_conflicts, linhas
+    # barradas pela constraint única (ex.: execuções simultâneas) não são contadas.
+    ja_gerados = Pagamento.objects.filter(
+        recorrencia__in=recorrencias, data_competencia__in={p.data_competencia for p in novos}
+    )
+
+    with transaction.atomic():
+        criados = 0
+        if novos:
+            antes = ja_gerados.count()
+            Pagamento.objects.bulk_create(novos, ignore_conflicts=True)
+            criados = ja_gerados.count() - antes
+        PagamentoRecorrente.objects.filter(id__in=[r.id for r in recorrencias]).update(gerado_ate=ate)
+        if criados:
+            Cliente.registrar_alteracao(cliente_id)
+    return criados
+
+
+def replanejar_pagamentos_futuros(recorrencia, hoje=None):
+    """
+    Aplica a agenda e os dados atuais da recorrência aos pagamentos já gerados, do
+    período (mês) corrente até `gerado_ate`. Cada período mantém um único pagamento:
+    os pendentes recebem o novo vencimento, descrição, valor e categoria; os de
+    períodos que saíram da agenda são removidos; períodos que entraram na agenda são
+    criados se o vencimento ainda não passou. Períodos já pagos não são alterados.
+    Recorrências inativas seguem descartar_pagamentos_futuros().
+    Retorna a quantidade de pagamentos alterados, criados ou removidos.
+    """
+    hoje = hoje or timezone.now().date()
+    if not recorrencia.ativo:
+        return descartar_pagamentos_futuros(recorrencia, hoje)
+    if recorrencia.gerado_ate is None:
+        return 0
+
+    mes_atual = hoje.replace(day=1)
+    agenda = {
+        data.replace(day=1): data
+        for data in vencimentos(recorrencia, recorrencia.gerado_ate)
+        if data >= mes_atual
+    }
+    campos = ('data_vencimento', 'descricao', 'valor', 'categoria_id')
+    with transaction.atomic():
+        gerados = {
+            p.data_competencia: p
+            for p in Pagamento.objects.select_for_update().filter(recorrencia=recorrencia, data_competencia__gte=mes_atual)
+        }
+        remover, alterar = [], []
+        for competencia, pagamento in gerados.items():
+            if pagamento.status != 'Pendente':
+                continue
+            if competencia not in agenda:
+                remover.append(pagamento.id)
+                continue
+            novo = novo_pagamento(recorrencia, agenda[competencia])
+            if any(getattr(pagamento, campo) != getattr(novo, campo) for campo in campos):
+                for campo in campos:
+                    setattr(pagamento, campo, getattr(novo, campo))
+                alterar.append(pagamento)
+        criar = [
+            novo_pagamento(recorrencia, vencimento)
+            for competencia, vencimento in agenda.items()
+            if competencia not in gerados and vencimento >= hoje
+        ]
+
+        Pagamento.objects.filter(id__in=remover).delete()
+        Pagamento.objects.bulk_update(alterar, campos)
+        Pagamento.objects.bulk_create(criar)
+    return len(remover) + len(alterar) + len(criar)
+
+
+def descartar_pagamentos_futuros(recorrencia, hoje=None):
+    """
+    Para pausas e exclusões: remove os pagamentos pendentes dos períodos posteriores
+    ao mês corrente e recua `gerado_ate` para o fim do mês, de modo que uma eventual
+    reativação volte a gerar a partir do mês seguinte. O período corrente é mantido.
+    """
+    hoje = hoje or timezone.now().date()
+    mes_atual = hoje.replace(day=1)
+    fim_do_mes = somar_meses(hoje, 1) - timedelta(days=1)
+    with transaction.atomic():
+        removidos, _ = Pagamento.objects.filter(
+            recorrencia=recorrencia, status='Pendente', data_competencia__gt=mes_atual
+        ).delete()
+        if PagamentoRecorrente.objects.filter(pk=recorrencia.pk, gerado_ate__gt=fim_do_mes).update(gerado_ate=fim_do_mes):
+            recorrencia.gerado_ate = fim_do_mes
+    return removidos
+
+
+def clientes_pendentes(ate):
+    """
+    IDs dos clientes que têm recorrências ativas ainda não geradas até `ate`.
+    """
+    return list(
+        recorrencias_pendentes(ate)
+        .values_list('cliente_id', flat=True)
+        .distinct()
+        .order_by('cliente_id')
+    )
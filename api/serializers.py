@@ -2,7 +2,7 @@
 
 from rest_framework import serializers
 from django.utils import timezone
-from .models import Pagamento, Categoria, Cliente, User
+from .models import Pagamento, PagamentoRecorrente, Categoria, Cliente, User
 
 class ClienteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -10,9 +10,29 @@ class ClienteSerializer(serializers.ModelSerializer):
         fields = ['id', 'nome_empresa']
 
 class CategoriaSerializer(serializers.ModelSerializer):
+    # Estatísticas anotadas pelo CategoriaViewSet; ausentes nas respostas de criação/edição.
+    total_pagamentos = serializers.IntegerField(read_only=True)
+    valor_total = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    ultimo_uso = serializers.DateField(read_only=True)
+
     class Meta:
         model = Categoria
-        fields = ['id', 'nome', 'descricao']
+        fields = ['id', 'nome', 'descricao', 'total_pagamentos', 'valor_total', 'ultimo_uso']
+
+class MesclarCategoriaSerializer(serializers.Serializer):
+    destino = serializers.PrimaryKeyRelatedField(queryset=Categoria.objects.all())
+    excluir_origem = serializers.BooleanField(default=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Categorias de outras empresas respondem como inexistentes, sem revelar que existem.
+        self.fields['destino'].queryset = Categoria.objects.filter(cliente_id=self.context['origem'].cliente_id)
+
+    def validate_destino(self, value):
+        origem = self.context['origem']
+        if value.id == origem.id:
+            raise serializers.ValidationError("A categoria de destino deve ser diferente da origem.")
+        return value
 
 class PagamentoSerializer(serializers.ModelSerializer):
     categoria_nome = serializers.CharField(source='categoria.nome', read_only=True, allow_null=True)
@@ -29,8 +49,9 @@ class PagamentoSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'descricao', 'valor', 'data_competencia', 'data_vencimento', 
             'data_pagamento', 'status', 'status_display', 'numero_nota_fiscal', 
-            'categoria', 'categoria_nome', 'data_criacao'
+            'categoria', 'categoria_nome', 'recorrencia', 'data_criacao'
         ]
+        read_only_fields = ['recorrencia']
 
     # --- A LÓGICA DE VALIDAÇÃO FOI ATUALIZADA ---
     def validate(self, data):
@@ -62,4 +83,37 @@ class PagamentoSerializer(serializers.ModelSerializer):
             cliente_do_usuario = self.context['request'].user.perfilusuario.cliente
             if value.cliente != cliente_do_usuario:
                 raise serializers.ValidationError("Você só pode usar categorias da sua própria empresa.")
-        return value
\ No newline at end of file
+        return value
+
+class PagamentoRecorrenteSerializer(serializers.ModelSerializer):
+    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True, allow_null=True)
+
+    categoria = serializers.PrimaryKeyRelatedField(
+        queryset=Categoria.objects.all(),
+        required=False,
+        allow_null=True
+    )
+
+    class Meta:
+        model = PagamentoRecorrente
+        fields = [
+            'id', 'descricao', 'valor', 'categoria', 'categoria_nome', 'dia_vencimento',
+            'intervalo_meses', 'data_inicio', 'data_fim', 'ativo', 'gerado_ate', 'data_criacao'
+        ]
+        read_only_fields = ['gerado_ate']
+
+    def validate(self, data):
+        data_inicio = data.get('data_inicio', getattr(self.instance, 'data_inicio', None))
+        data_fim = data.get('data_fim', getattr(self.instance, 'data_fim', None))
+        if data_inicio and data_fim and data_fim < data_inicio:
+            raise serializers.ValidationError({
+                'data_fim': 'A data final não pode ser anterior à data de início.'
+            })
+        return super().validate(data)
+
+    def validate_categoria(self, value):
+        if value and 'request' in self.context:
+            cliente_do_usuario = self.context['request'].user.perfilusuario.cliente
+            if value.cliente != cliente_do_usuario:
+                raise serializers.ValidationError("Você só pode usar categorias da sua própria empresa.")
+        return value
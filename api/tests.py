@@ -1,3 +1,304 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from .categorias import reatribuir_pagamentos
+from .models import Cliente, Categoria, Pagamento, PagamentoRecorrente, PerfilUsuario
+from .recorrencias import (
+    ocorrencias, gerar_pagamentos_do_cliente, replanejar_pagamentos_futuros, descartar_pagamentos_futuros,
+)
+
+
+class OcorrenciasTests(SimpleTestCase):
+    def recorrencia(self, **campos):
+        dados = {'descricao': 'Aluguel', 'valor': Decimal('1500.00'), 'dia_vencimento': 10,
+                 'intervalo_meses': 1, 'data_inicio': date(2027, 1, 1)}
+        dados.update(campos)
+        return PagamentoRecorrente(**dados)
+
+    def test_dia_31_cai_no_ultimo_dia_do_mes(self):
+        recorrencia = self.recorrencia(dia_vencimento=31)
+        datas = list(ocorrencias(recorrencia, date(2027, 3, 31), hoje=date(2027, 1, 1)))
+        self.assertEqual(datas, [date(2027, 1, 31), date(2027, 2, 28), date(2027, 3, 31)])
+
+    def test_intervalo_em_meses(self):
+        recorrencia = self.recorrencia(intervalo_meses=2)
+        datas = list(ocorrencias(recorrencia, date(2027, 6, 30), hoje=date(2027, 1, 1)))
+        self.assertEqual(datas, [date(2027, 1, 10), date(2027, 3, 10), date(2027, 5, 10)])
+
+    def test_data_fim_limita_as_ocorrencias(self):
+        recorrencia = self.recorrencia(data_fim=date(2027, 2, 15))
+        datas = list(ocorrencias(recorrencia, date(2027, 6, 30), hoje=date(2027, 1, 1)))
+        self.assertEqual(datas, [date(2027, 1, 10), date(2027, 2, 10)])
+
+    def test_ignora_ocorrencias_ate_gerado_ate(self):
+        recorrencia = self.recorrencia(gerado_ate=date(2027, 2, 28))
+        datas = list(ocorrencias(recorrencia, date(2027, 4, 30), hoje=date(2027, 1, 1)))
+        self.assertEqual(datas, [date(2027, 3, 10), date(2027, 4, 10)])
+
+    def test_inicio_no_passado_nao_gera_meses_anteriores_a_hoje(self):
+        recorrencia = self.recorrencia(dia_vencimento=15, data_inicio=date(2025, 1, 15))
+        datas = list(ocorrencias(recorrencia, date(2027, 1, 31), hoje=date(2026, 10, 19)))
+        self.assertEqual(datas, [date(2026, 11, 15), date(2026, 12, 15), date(2027, 1, 15)])
+
+    def test_reativada_apos_pausa_nao_gera_meses_da_pausa(self):
+        recorrencia = self.recorrencia(gerado_ate=date(2026, 3, 31), data_inicio=date(2026, 1, 1))
+        datas = list(ocorrencias(recorrencia, date(2026, 12, 31), hoje=date(2026, 10, 19)))
+        self.assertEqual(datas, [date(2026, 11, 10), date(2026, 12, 10)])
+
+    def test_intervalo_invalido_nao_gera_ocorrencias(self):
+        recorrencia = self.recorrencia(intervalo_meses=0)
+        self.assertEqual(list(ocorrencias(recorrencia, date(2027, 12, 31), hoje=date(2027, 1, 1))), [])
+
+
+class GerarPagamentosTests(TestCase):
+    hoje = date(2027, 1, 1)
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nome_empresa='Empresa Teste')
+        self.recorrencia = PagamentoRecorrente.objects.create(
+            cliente=self.cliente, descricao='Aluguel', valor=Decimal('1500.00'),
+            dia_vencimento=10, data_inicio=date(2027, 1, 1),
+        )
+
+    def test_executar_duas_vezes_nao_duplica(self):
+        criados = gerar_pagamentos_do_cliente(self.cliente.id, date(2027, 3, 31), self.hoje)
+        self.assertEqual(criados, 3)
+        self.assertEqual(gerar_pagamentos_do_cliente(self.cliente.id, date(2027, 3, 31), self.hoje), 0)
+        self.assertEqual(Pagamento.objects.filter(recorrencia=self.recorrencia).count(), 3)
+        self.recorrencia.refresh_from_db()
+        self.assertEqual(self.recorrencia.gerado_ate, date(2027, 3, 31))
+
+    def test_conta_apenas_pagamentos_inseridos(self):
+        # Simula uma ocorrência inserida por uma execução concorrente.
+        Pagamento.objects.create(
+            cliente=self.cliente, recorrencia=self.recorrencia, descricao='Aluguel', valor=Decimal('1500.00'),
+            data_competencia=date(2027, 2, 1), data_vencimento=date(2027, 2, 10),
+        )
+        versao = self.cliente.versao_dados
+        criados = gerar_pagamentos_do_cliente(self.cliente.id, date(2027, 3, 31), self.hoje)
+        self.assertEqual(criados, 2)
+        self.cliente.refresh_from_db()
+        self.assertEqual(self.cliente.versao_dados, versao + 1)
+
+    def pagamentos(self):
+        return list(
+            Pagamento.objects.filter(recorrencia=self.recorrencia)
+            .order_by('data_competencia').values_list('data_competencia', 'data_vencimento', 'status')
+        )
+
+    def mudar_dia(self, dia, hoje):
+        self.recorrencia.refresh_from_db()
+        self.recorrencia.dia_vencimento = dia
+        self.recorrencia.save()
+        return replanejar_pagamentos_futuros(self.recorrencia, hoje)
+
+    def test_competencia_e_o_primeiro_dia_do_mes(self):
+        gerar_pagamentos_do_cliente(self.cliente.id, date(2027, 2, 28), self.hoje)
+        self.assertEqual(self.pagamentos(), [
+            (date(2027, 1, 1), date(2027, 1, 10), 'Pendente'),
+            (date(2027, 2, 1), date(2027, 2, 10), 'Pendente'),
+        ])
+
+    def test_mudar_dia_mantem_um_pagamento_por_mes(self):
+        gerar_pagamentos_do_cliente(self.cliente.id, date(2027, 3, 31), self.hoje)
+        Pagamento.objects.filter(data_competencia=date(2027, 2, 1)).update(status='Pago')
+
+        self.assertEqual(self.mudar_dia(20, date(2027, 1, 15)), 2)
+        self.assertEqual(self.pagamentos(), [
+            (date(2027, 1, 1), date(2027, 1, 20), 'Pendente'),
+            (date(2027, 2, 1), date(2027, 2, 10), 'Pago'),
+            (date(2027, 3, 1), date(2027, 3, 20), 'Pendente'),
+        ])
+
+        # A volta para um dia já passado mantém o período corrente.
+        self.mudar_dia(10, date(2027, 1, 15))
+        self.assertEqual(self.pagamentos(), [
+            (date(2027, 1, 1), date(2027, 1, 10), 'Pendente'),
+            (date(2027, 2, 1), date(2027, 2, 10), 'Pago'),
+            (date(2027, 3, 1), date(2027, 3, 10), 'Pendente'),
+        ])
+
+        # Rodar o gerador de novo não duplica nenhum mês.
+        self.assertEqual(gerar_pagamentos_do_cliente(self.cliente.id, date(2027, 3, 31), date(2027, 1, 15)), 0)
+
+    def test_mudar_intervalo_remove_e_cria_periodos(self):
+        gerar_pagamentos_do_cliente(self.cliente.id, date(2027, 4, 30), self.hoje)
+        self.recorrencia.refresh_from_db()
+        self.recorrencia.intervalo_meses = 2
+        self.recorrencia.data_inicio = date(2027, 2, 1)
+        self.recorrencia.save()
+        replanejar_pagamentos_futuros(self.recorrencia, date(2027, 1, 5))
+        self.assertEqual([p[0] for p in self.pagamentos()], [date(2027, 2, 1), date(2027, 4, 1)])
+
+    def test_replanejar_sem_mudanca_nao_altera_nada(self):
+        gerar_pagamentos_do_cliente(self.cliente.id, date(2027, 3, 31), self.hoje)
+        self.recorrencia.refresh_from_db()
+        self.assertEqual(replanejar_pagamentos_futuros(self.recorrencia, date(2027, 1, 15)), 0)
+
+    def test_pausar_mantem_periodo_corrente(self):
+        gerar_pagamentos_do_cliente(self.cliente.id, date(2027, 3, 31), self.hoje)
+        self.recorrencia.refresh_from_db()
+        self.recorrencia.ativo = False
+        self.recorrencia.save()
+        self.assertEqual(replanejar_pagamentos_futuros(self.recorrencia, date(2027, 1, 15)), 2)
+        self.assertEqual([p[0] for p in self.pagamentos()], [date(2027, 1, 1)])
+        self.recorrencia.refresh_from_db()
+        self.assertEqual(self.recorrencia.gerado_ate, date(2027, 1, 31))
+
+
+class CategoriaMesclarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cliente = Cliente.objects.create(nome_empresa='Empresa Teste')
+        self.usuario = User.objects.create_user(username='financeiro', password='senha')
+        PerfilUsuario.objects.create(usuario=self.usuario, cliente=self.cliente)
+        self.origem = Categoria.objects.create(cliente=self.cliente, nome='Luz')
+        self.destino = Categoria.objects.create(cliente=self.cliente, nome='Energia')
+        for dia in range(1, 6):
+            Pagamento.objects.create(
+                cliente=self.cliente, categoria=self.origem, descricao='Conta de luz', valor=Decimal('100.00'),
+                data_competencia=date(2027, 1, dia), data_vencimento=date(2027, 1, dia),
+            )
+        self.api = APIClient()
+
+    def autenticar(self):
+        # Recarrega o usuário a cada requisição, como faz a autenticação JWT.
+        self.api.force_authenticate(User.objects.get(pk=self.usuario.pk))
+
+    def estatisticas(self):
+        self.autenticar()
+        return {c['nome']: c for c in self.api.get('/api/categorias/').json()}
+
+    def test_reatribuir_em_lotes_move_todos_os_pagamentos(self):
+        movidos, _ = reatribuir_pagamentos(self.origem, self.destino, tamanho_lote=2)
+        self.assertEqual(movidos, 5)
+        self.assertFalse(Pagamento.objects.filter(categoria=self.origem).exists())
+        self.assertEqual(Pagamento.objects.filter(categoria=self.destino).count(), 5)
+
+    def test_mesclar_atualiza_listagem_em_cache(self):
+        antes = self.estatisticas()
+        self.assertEqual(antes['Luz']['total_pagamentos'], 5)
+        self.assertEqual(antes['Luz']['valor_total'], '500.00')
+        self.assertEqual(antes['Energia']['total_pagamentos'], 0)
+
+        self.autenticar()
+        resposta = self.api.post(
+            f'/api/categorias/{self.origem.id}/mesclar/',
+            {'destino': self.destino.id, 'excluir_origem': True}, format='json',
+        )
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['pagamentos_movidos'], 5)
+        self.assertFalse(Categoria.objects.filter(pk=self.origem.pk).exists())
+
+        depois = self.estatisticas()
+        self.assertNotIn('Luz', depois)
+        self.assertEqual(depois['Energia']['total_pagamentos'], 5)
+        self.assertEqual(depois['Energia']['ultimo_uso'], '2027-01-05')
+
+    def test_mesclar_rejeita_entrada_invalida(self):
+        outro_cliente = Cliente.objects.create(nome_empresa='Outra Empresa')
+        de_outro_cliente = Categoria.objects.create(cliente=outro_cliente, nome='Luz')
+        url = f'/api/categorias/{self.origem.id}/mesclar/'
+        for corpo in ([1, 2], {'destino': 'x'}, {'destino': self.origem.id}, {'destino': de_outro_cliente.id}):
+            self.autenticar()
+            self.assertEqual(self.api.post(url, corpo, format='json').status_code, 400, corpo)
+        self.assertEqual(Pagamento.objects.filter(categoria=self.origem).count(), 5)
+
+    def test_mesclar_nao_distingue_categoria_de_outra_empresa_de_inexistente(self):
+        de_outro_cliente = Categoria.objects.create(cliente=Cliente.objects.create(nome_empresa='Outra'), nome='Luz')
+        url = f'/api/categorias/{self.origem.id}/mesclar/'
+        erros = []
+        for destino in (de_outro_cliente.id, de_outro_cliente.id + 1000):
+            self.autenticar()
+            erros.append(self.api.post(url, {'destino': destino}, format='json').json()['destino'])
+        self.assertEqual(erros[0], [e.replace(str(de_outro_cliente.id + 1000), str(de_outro_cliente.id)) for e in erros[1]])
+
+
+class ProvisionarTenantsTests(TestCase):
+    def csv(self, conteudo, encoding='utf-8'):
+        descritor, caminho = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(descritor, 'w', encoding=encoding, newline='') as arquivo:
+            arquivo.write(conteudo)
+        self.addCleanup(os.remove, caminho)
+        return caminho
+
+    def provisionar(self, caminho, *args):
+        saida = StringIO()
+        call_command('provisionar_tenants', caminho, '--workers', '1', *args, stdout=saida)
+        return saida.getvalue()
+
+    def test_segunda_execucao_nao_cria_nada(self):
+        caminho = self.csv(
+            "nome_empresa,username,email,senha\n"
+            "Empresa A,ana,ana@exemplo.com,segredo123\n"
+            "Empresa A,beto,,segredo123\n"
+            "Empresa B,carla,,segredo123\n"
+        )
+        saida = self.provisionar(caminho)
+        self.assertIn('Registros criados: 2 clientes, 3 usuários, 3 perfis, 12 categorias.', saida)
+        self.assertEqual(User.objects.get(username='beto').perfilusuario.cliente.nome_empresa, 'Empresa A')
+        self.assertTrue(User.objects.get(username='ana').check_password('segredo123'))
+
+        saida = self.provisionar(caminho)
+        self.assertIn('Registros criados: 0 clientes, 0 usuários, 0 perfis, 0 categorias.', saida)
+        self.assertEqual(Categoria.objects.filter(cliente__nome_empresa='Empresa A').count(), 6)
+
+    def test_usuario_de_outro_cliente_e_reportado_e_mantido(self):
+        outro = Cliente.objects.create(nome_empresa='Outra Empresa')
+        usuario = User.objects.create_user(username='ana', password='original')
+        PerfilUsuario.objects.create(usuario=usuario, cliente=outro)
+
+        saida = self.provisionar(self.csv("nome_empresa,username,email,senha\nEmpresa A,ana,,nova\n"))
+        self.assertIn('ana -> Empresa A', saida)
+        usuario.refresh_from_db()
+        self.assertEqual(usuario.perfilusuario.cliente, outro)
+        self.assertTrue(usuario.check_password('original'))
+
+    def test_cliente_existente_sem_categorias_recebe_modelo_uma_vez(self):
+        cliente = Cliente.objects.create(nome_empresa='Empresa A')
+        caminho = self.csv("nome_empresa,username,email,senha\nEmpresa A,ana,,x\n")
+
+        self.provisionar(caminho, '--sem-categorias')
+        self.assertFalse(cliente.categorias.exists())
+
+        self.provisionar(caminho)
+        self.provisionar(caminho)
+        self.assertEqual(cliente.categorias.count(), 6)
+        cliente.refresh_from_db()
+        self.assertEqual(cliente.versao_dados, 1)
+
+    def test_senha_vazia_gera_senha_inutilizavel(self):
+        self.provisionar(self.csv("nome_empresa,username,email,senha\nEmpresa A,ana,,\n"))
+        self.assertFalse(User.objects.get(username='ana').has_usable_password())
+
+    def test_csv_invalido_gera_command_error(self):
+        casos = {
+            'ausentes': ("nome_empresa,email\nEmpresa A,a@exemplo.com\n", 'Colunas obrigatórias ausentes'),
+            'repetido': ("nome_empresa,username\nA,ana\nB,ana\n", "Linha 3: usuário 'ana' repetido"),
+            'vazio': ("nome_empresa,username\nA,\n", 'Linha 2:'),
+            'empresa longa': (f"nome_empresa,username\n{'x' * 201},ana\n", "Linha 2: 'nome_empresa' excede 200"),
+            'username longo': (f"nome_empresa,username\nA,{'a' * 151}\n", "Linha 2: 'username' excede 150"),
+            'username inválido': ("nome_empresa,username\nA,ana silva\n", 'Linha 2:'),
+            'email inválido': ("nome_empresa,username,email\nA,ana,nao-e-email\n", 'Linha 2:'),
+        }
+        for caso, (conteudo, mensagem) in casos.items():
+            with self.subTest(caso), self.assertRaisesMessage(CommandError, mensagem):
+                self.provisionar(self.csv(conteudo))
+        self.assertFalse(Cliente.objects.filter(nome_empresa='A').exists())
+
+    def test_arquivo_ilegivel_gera_command_error(self):
+        with self.assertRaisesMessage(CommandError, 'Não foi possível ler'):
+            self.provisionar('/caminho/que/nao/existe.csv')
+        caminho = self.csv("nome_empresa,username\nEmpresa Ç,ana\n", encoding='latin-1')
+        with self.assertRaisesMessage(CommandError, 'CSV inválido'):
+            self.provisionar(caminho)
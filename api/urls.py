@@ -3,6 +3,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     PagamentoViewSet, 
+    PagamentoRecorrenteViewSet,
     CategoriaViewSet, 
     ClienteAdminViewSet, 
     get_user_profile,
@@ -11,6 +12,7 @@ from .views import (
 
 router = DefaultRouter()
 router.register(r'pagamentos', PagamentoViewSet, basename='pagamento')
+router.register(r'pagamentos-recorrentes', PagamentoRecorrenteViewSet, basename='pagamento-recorrente')
 router.register(r'categorias', CategoriaViewSet, basename='categoria')
 router.register(r'admin/clientes', ClienteAdminViewSet, basename='admin-cliente')
 
@@ -3,13 +3,15 @@
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.views import APIView
 from rest_framework.pagination import PageNumberPagination
 
 from django.http import HttpResponse
 from django.utils import timezone
-from django.db.models import Sum, Q
+from django.core.cache import cache
+from django.db.models import Sum, Count, Max, Q, Value, DecimalField
+from django.db.models.functions import Coalesce
 
 import io
 import openpyxl
@@ -20,9 +22,11 @@ from reportlab.lib.units import inch
 
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import Pagamento, Categoria, Cliente, User, PerfilUsuario
-from .serializers import PagamentoSerializer, CategoriaSerializer, ClienteSerializer
+from .models import Pagamento, PagamentoRecorrente, Categoria, Cliente, User, PerfilUsuario
+from .serializers import PagamentoSerializer, PagamentoRecorrenteSerializer, CategoriaSerializer, ClienteSerializer, MesclarCategoriaSerializer
 from .filters import PagamentoFilter
+from .categorias import reatribuir_pagamentos
+from .recorrencias import replanejar_pagamentos_futuros, descartar_pagamentos_futuros
 
 def get_cliente_from_request(request):
     user = request.user
@@ -57,15 +61,61 @@ class PagamentoPagination(PageNumberPagination):
             'results': data
         })
 
+# Tempo máximo da listagem de categorias em cache; alterações invalidam antes via Cliente.versao_dados.
+CACHE_CATEGORIAS_SEGUNDOS = 60 * 60
+
 class CategoriaViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = CategoriaSerializer
     def get_queryset(self):
         cliente = get_cliente_from_request(self.request)
-        return Categoria.objects.filter(cliente=cliente) if cliente else Categoria.objects.none()
+        if not cliente:
+            return Categoria.objects.none()
+        # Estatísticas de uso calculadas em uma única consulta agregada.
+        return Categoria.objects.filter(cliente=cliente).annotate(
+            total_pagamentos=Count('pagamento'),
+            valor_total=Coalesce(Sum('pagamento__valor'), Value(0), output_field=DecimalField(max_digits=14, decimal_places=2)),
+            ultimo_uso=Max('pagamento__data_competencia'),
+        ).order_by('nome')
+    def list(self, request, *args, **kwargs):
+        cliente = get_cliente_from_request(request)
+        if not cliente:
+            return super().list(request, *args, **kwargs)
+        chave = f'categorias:{cliente.id}:v{cliente.versao_dados}'
+        dados = cache.get(chave)
+        if dados is None:
+            dados = self.get_serializer(self.get_queryset(), many=True).data
+            cache.set(chave, dados, CACHE_CATEGORIAS_SEGUNDOS)
+        return Response(dados)
     def perform_create(self, serializer):
         cliente = get_cliente_from_request(self.request)
         serializer.save(cliente=cliente)
+        Cliente.registrar_alteracao(cliente.id)
+    def perform_update(self, serializer):
+        serializer.save()
+        Cliente.registrar_alteracao(serializer.instance.cliente_id)
+    def perform_destroy(self, instance):
+        # Desvincula os pagamentos em lotes antes de excluir, em vez de um único SET_NULL gigante.
+        reatribuir_pagamentos(instance, None, excluir_origem=True)
+
+    @action(detail=True, methods=['post'])
+    def mesclar(self, request, pk=None):
+        """
+        Move todos os pagamentos desta categoria para a categoria `destino`.
+        Com `excluir_origem=true`, a categoria de origem é excluída ao final.
+        """
+        origem = self.get_object()
+        entrada = MesclarCategoriaSerializer(data=request.data, context={'origem': origem})
+        entrada.is_valid(raise_exception=True)
+        excluir_origem = entrada.validated_data['excluir_origem']
+        pagamentos_movidos, recorrencias_movidas = reatribuir_pagamentos(
+            origem, entrada.validated_data['destino'], excluir_origem=excluir_origem
+        )
+        return Response({
+            'pagamentos_movidos': pagamentos_movidos,
+            'recorrencias_movidas': recorrencias_movidas,
+            'origem_excluida': excluir_origem,
+        })
 
 class PagamentoViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
@@ -81,6 +131,34 @@ class PagamentoViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         cliente = get_cliente_from_request(self.request)
         serializer.save(cliente=cliente)
+        Cliente.registrar_alteracao(cliente.id)
+    def perform_update(self, serializer):
+        serializer.save()
+        Cliente.registrar_alteracao(serializer.instance.cliente_id)
+    def perform_destroy(self, instance):
+        instance.delete()
+        Cliente.registrar_alteracao(instance.cliente_id)
+
+class PagamentoRecorrenteViewSet(viewsets.ModelViewSet):
+    permission_classes = [IsAuthenticated]
+    serializer_class = PagamentoRecorrenteSerializer
+    def get_queryset(self):
+        cliente = get_cliente_from_request(self.request)
+        return PagamentoRecorrente.objects.filter(cliente=cliente).select_related('categoria').order_by('dia_vencimento', 'descricao') if cliente else PagamentoRecorrente.objects.none()
+    def perform_create(self, serializer):
+        cliente = get_cliente_from_request(self.request)
+        serializer.save(cliente=cliente)
+    def perform_update(self, serializer):
+        recorrencia = serializer.save()
+        # Reaplica a agenda aos pagamentos pendentes já gerados; o cache das categorias só
+        # é invalidado se algum pagamento mudou.
+        if replanejar_pagamentos_futuros(recorrencia):
+            Cliente.registrar_alteracao(recorrencia.cliente_id)
+    def perform_destroy(self, instance):
+        removidos = descartar_pagamentos_futuros(instance)
+        instance.delete()
+        if removidos:
+            Cliente.registrar_alteracao(instance.cliente_id)
 
 class ClienteAdminViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Cliente.objects.all().order_by('nome_empresa')